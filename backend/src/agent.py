@@ -1,8 +1,14 @@
+import asyncio
 import logging
 import json
+import time
+import uuid
+from collections import Counter
 from datetime import datetime
 from pathlib import Path
+from typing import Annotated, Literal, Optional
 from dotenv import load_dotenv
+from pydantic import Field
 
 from livekit.agents import (
     Agent,
@@ -18,8 +24,116 @@ from livekit.agents import (
 from livekit.plugins import murf, silero, google, deepgram
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
 
+try:
+    import orjson
+except ImportError:  # e.g. unsynced envs; the stdlib fallback writes the same bytes
+    orjson = None
+
 logger = logging.getLogger("dnd-game-master")
-load_dotenv(".env.local")
+
+# Created lazily on a session's first write
+_SESSIONS_DIR = Path("game_sessions")
+
+
+# Byte-stable part of the GM prompt. Everything session-specific goes in the
+# tail built by _build_instructions so the provider's prefix cache can hit.
+STATIC_PREFIX = """You are the Game Master of a voice tabletop RPG. Universe and tone are in SESSION SETTINGS below.
+
+ROLE:
+- Narrate scenes, voice NPCs, react logically to the player's choices
+- Keep continuity: reference past events, NPCs, items and consequences
+- Clever ideas may work; impossible ones get a quick reason and an alternative
+
+EVERY REPLY:
+- 1-2 sentences of outcome or scene, then end with an action question ("What do you do?")
+
+PACING (6-8 turns total):
+- Turn 1 hook, turns 2-4 escalate, turns 5-6 climax, turn 7 resolve
+
+TOOLS:
+- update_state: story beats, items, companions
+- Detective universe: case_action for clues ("clue"), suspects ("suspect"), notes ("review"); include red herrings, let the player interrogate and examine scenes, reveal the culprit from the evidence; use noir slang
+
+NEVER:
+- Choose for the player or narrate their thoughts/feelings
+- Force one solution
+- Use meta-gaming language ("roll for", "make a check")"""
+
+
+# Universe settings, built once at import
+_UNIVERSE_TABLE: dict[str, dict[str, str]] = {
+    "fantasy": {
+        "setting": "a medieval fantasy realm of magic, dragons, and ancient kingdoms",
+        "starting_location": "the bustling market square of Thornhaven, a frontier town",
+        "threats": "bandits, monsters, dark wizards, and ancient curses",
+        "tone_desc": "epic and adventurous"
+    },
+    "sci-fi": {
+        "setting": "a distant future among the stars, where humanity has colonized multiple planets",
+        "starting_location": "the cargo bay of the starship Odyssey, docked at Station Epsilon",
+        "threats": "alien creatures, rogue AI, space pirates, and corporate conspiracies",
+        "tone_desc": "mysterious and tense"
+    },
+    "post-apocalypse": {
+        "setting": "a world devastated by nuclear war, where survivors struggle in the wasteland",
+        "starting_location": "the ruins of what was once a shopping mall, now a survivor settlement",
+        "threats": "raiders, mutants, radiation storms, and scarce resources",
+        "tone_desc": "gritty and survival-focused"
+    },
+    "horror": {
+        "setting": "a small town plagued by supernatural forces and dark secrets",
+        "starting_location": "an old Victorian mansion on the outskirts of Ravencrest",
+        "threats": "ghosts, demons, cultists, and eldritch horrors",
+        "tone_desc": "spooky and atmospheric"
+    },
+    "detective": {
+        "setting": "a noir-style city in the 1940s, where crime and corruption run deep",
+        "starting_location": "your cramped detective office on the third floor of a rundown building on 5th Street",
+        "threats": "murderers, crime syndicates, corrupt officials, and dark conspiracies",
+        "tone_desc": "noir and mysterious, with sharp observations and clever deductions"
+    }
+}
+
+# Full prompts memoized per (universe, tone) for the lifetime of the worker
+_INSTRUCTIONS_BY_KEY: dict[tuple[str, str], str] = {}
+
+
+def _build_instructions(universe: str, tone: str) -> str:
+    """Return the GM instructions for a universe/tone pair, formatting them once."""
+    key = (universe, tone)
+    instructions = _INSTRUCTIONS_BY_KEY.get(key)
+    if instructions is None:
+        world = _UNIVERSE_TABLE.get(universe, _UNIVERSE_TABLE["detective"])
+        # Session-specific tail; keep every substitution after STATIC_PREFIX
+        dynamic_suffix = f"""SESSION SETTINGS:
+- Universe: {universe} - {world['setting']}
+- Tone: {tone} - use {world['tone_desc']} language
+
+START: Ask the player's character name, then open at {world['starting_location']}."""
+        instructions = STATIC_PREFIX + "\n\n" + dynamic_suffix
+        _INSTRUCTIONS_BY_KEY[key] = instructions
+    return instructions
+
+
+# Pacing guidance appended to record_event, indexed by turn count
+_ESCALATE = "ESCALATE - Present the main challenge soon."
+_CLIMAX = "CLIMAX - Build to the final confrontation or revelation NOW."
+_PACING_CAP = "WRAP UP NOW - End the story in the next response with a satisfying conclusion."
+_PACING: tuple[str, ...] = ("", "", "", _ESCALATE, _ESCALATE, _CLIMAX, _CLIMAX)
+
+
+def _dumps_indented(data: dict) -> bytes:
+    """Serialize data as indented JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode()
+
+
+def _dumps_line(data: dict) -> bytes:
+    """Serialize data as a single JSON Lines record."""
+    if orjson is not None:
+        return orjson.dumps(data) + b"\n"
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
 
 
 class GameMasterAgent(Agent):
@@ -27,213 +141,156 @@ class GameMasterAgent(Agent):
         self.universe = universe
         self.tone = tone
         self.turn_count = 0
-        self.story_events = []
+        # Story events, clues and suspects are appended to a per-session JSONL
+        # log as they happen; save_session only writes a small metadata file
+        # Random suffix keeps rooms started in the same second from sharing files
+        self._session_id = f"SESSION_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        self._log_path = _SESSIONS_DIR / f"{self._session_id}.jsonl"
+        self._log_fp = None
+        self._log_pending: list[dict] = []
+        self._log_task: Optional[asyncio.Task] = None
+        self._sessions_dir_ready = False
         self.player_name = None
         self.current_location = None
-        self.inventory = []
+        self.inventory: Counter[str] = Counter()
         self.companions = []
-        self.clues = []  # For detective universe
-        self.suspects = []  # For detective universe
-        
-        # Define the universe settings
-        universe_settings = {
-            "fantasy": {
-                "setting": "a medieval fantasy realm of magic, dragons, and ancient kingdoms",
-                "starting_location": "the bustling market square of Thornhaven, a frontier town",
-                "threats": "bandits, monsters, dark wizards, and ancient curses",
-                "tone_desc": "epic and adventurous"
-            },
-            "sci-fi": {
-                "setting": "a distant future among the stars, where humanity has colonized multiple planets",
-                "starting_location": "the cargo bay of the starship Odyssey, docked at Station Epsilon",
-                "threats": "alien creatures, rogue AI, space pirates, and corporate conspiracies",
-                "tone_desc": "mysterious and tense"
-            },
-            "post-apocalypse": {
-                "setting": "a world devastated by nuclear war, where survivors struggle in the wasteland",
-                "starting_location": "the ruins of what was once a shopping mall, now a survivor settlement",
-                "threats": "raiders, mutants, radiation storms, and scarce resources",
-                "tone_desc": "gritty and survival-focused"
-            },
-            "horror": {
-                "setting": "a small town plagued by supernatural forces and dark secrets",
-                "starting_location": "an old Victorian mansion on the outskirts of Ravencrest",
-                "threats": "ghosts, demons, cultists, and eldritch horrors",
-                "tone_desc": "spooky and atmospheric"
-            },
-            "detective": {
-                "setting": "a noir-style city in the 1940s, where crime and corruption run deep",
-                "starting_location": "your cramped detective office on the third floor of a rundown building on 5th Street",
-                "threats": "murderers, crime syndicates, corrupt officials, and dark conspiracies",
-                "tone_desc": "noir and mysterious, with sharp observations and clever deductions"
-            }
-        }
         
-        self.world = universe_settings.get(universe, universe_settings["detective"])
-        
-        super().__init__(
-            instructions=f"""You are an expert Game Master (GM) running a {tone} {universe} tabletop RPG adventure.
-
-UNIVERSE: {self.world['setting']}
-
-YOUR ROLE AS GM:
-1. You describe scenes vividly and immersively
-2. You control NPCs (non-player characters) and the environment
-3. You react to the player's choices and drive the story forward
-4. You maintain continuity - remember what happened before
-5. You create challenges, mysteries, and opportunities for the player
-
-STORYTELLING RULES:
-- Use {self.world['tone_desc']} language appropriate to the {tone} tone
-- Keep descriptions extremely concise (1-2 sentences) before prompting player action
-- NO long descriptions - get to the action immediately
-- React logically to player choices - if they try something clever, it might work
-- If they try something impossible, quickly explain why and offer an alternative
-- Track important details: locations visited, NPCs met, items found
-- Build toward a quick climax by turn 6
-- Actively push story toward conclusion after turn 5
-
-CONVERSATION FLOW:
-1. Describe the current scene or situation
-2. Present choices or challenges (not always explicit - let them be creative)
-3. ALWAYS end with a question prompting action:
-   - "What do you do?"
-   - "How do you respond?"
-   - "What's your next move?"
-4. When player responds, describe the outcome and consequences
-5. Continue the story based on their action
-
-IMPORTANT CONTINUITY:
-- Reference past events: "You remember the merchant mentioned this place..."
-- Track relationships: "The guard recognizes you from earlier..."
-- Build consequences: "Your earlier choice to spare the bandit has consequences..."
-- Remember items/abilities: "You still have the rusty key from the tavern..."
-
-DETECTIVE UNIVERSE SPECIAL RULES (if applicable):
-- Use record_clue tool when player discovers evidence
-- Use add_suspect tool when player encounters persons of interest
-- Use review_case_notes when player wants to review their investigation
-- Present red herrings and misleading evidence
-- Allow player to interrogate suspects and examine crime scenes
-- Build toward revealing the culprit based on accumulated evidence
-- Use noir language: "dame", "gumshoe", "case", "lead", "stiff" (for corpse)
-
-PACING (CRITICAL - KEEP STORIES SHORT):
-- Target: Complete story in 6-8 conversational turns (approximately 5-7 minutes)
-- Turn 1: Quick intro and immediate hook
-- Turns 2-4: Rapid escalation with 1-2 challenges
-- Turns 5-6: Quick climax
-- Turn 7: Fast resolution and ending
-- Keep each response to 2-3 sentences maximum
-- Move the story forward quickly - don't linger on descriptions
-- After turn 6, start wrapping up the story
-- Use phrases like "Time is running out" or "This is it" to signal climax
-
-DO NOT:
-- Make choices for the player
-- Tell them what their character thinks or feels
-- Railroad them into one solution
-- Forget previous events or conversations
-- Use meta-gaming language (don't say "roll for", "make a check", etc.)
-
-START: Begin by asking the player their character's name, then launch into the opening scene at {self.world['starting_location']}.""",
-        )
+        self.world = _UNIVERSE_TABLE.get(universe, _UNIVERSE_TABLE["detective"])
+        
+        super().__init__(instructions=_build_instructions(universe, tone))
+    
+    async def on_exit(self) -> None:
+        await self._flush_log()
+        if self._log_fp is not None:
+            await asyncio.to_thread(self._log_fp.close)
+            self._log_fp = None
+    
+    def _log(self, record: dict) -> None:
+        """Queue a record for the session log; it is written on a worker thread."""
+        self._log_pending.append(record)
+        if self._log_task is None or self._log_task.done():
+            self._log_task = asyncio.create_task(self._drain_log())
+    
+    async def _drain_log(self) -> None:
+        # Single writer per session, so records land in order
+        while self._log_pending:
+            records, self._log_pending = self._log_pending, []
+            try:
+                await asyncio.to_thread(self._write_log_records, records)
+            except Exception:
+                logger.exception("Failed to write %d record(s) to %s", len(records), self._log_path)
+                # Re-queue the batch ahead of newer records; the next write or flush retries it
+                self._log_pending[:0] = records
+                return
+    
+    def _write_log_records(self, records: list[dict]) -> None:
+        if self._log_fp is None:
+            self._ensure_sessions_dir()
+            # Held open for the whole session and closed in on_exit
+            self._log_fp = open(self._log_path, "ab", buffering=8192)  # noqa: SIM115
+        self._log_fp.write(b"".join(
+            _dumps_line({**r, "timestamp": datetime.fromtimestamp(r["timestamp"]).isoformat()})
+            for r in records
+        ))
+    
+    def _ensure_sessions_dir(self) -> None:
+        """Create the sessions directory on this session's first write."""
+        if not self._sessions_dir_ready:
+            self._log_path.parent.mkdir(parents=True, exist_ok=True)
+            self._sessions_dir_ready = True
+    
+    def _write_session_file(self, path: Path, payload: bytes) -> None:
+        self._ensure_sessions_dir()
+        path.write_bytes(payload)
+    
+    async def _flush_log(self) -> None:
+        """Wait for queued records and flush them to disk."""
+        if self._log_task is not None:
+            await self._log_task
+        if self._log_pending:
+            # Retry a batch whose earlier write failed, through the single writer task
+            self._log_task = asyncio.create_task(self._drain_log())
+            await self._log_task
+        if self._log_fp is not None:
+            await asyncio.to_thread(self._log_fp.flush)
     
     @function_tool
-    async def record_event(
-        self, 
-        context: RunContext, 
-        event_type: str, 
-        description: str,
-        location: str = None
+    async def update_state(
+        self,
+        context: RunContext,
+        kind: Annotated[Literal["event", "item", "companion"], Field(description="What changed")],
+        name: Annotated[str, Field(description="Event type, item name, or companion name, depending on kind")],
+        description: Annotated[str, Field(description="What happened (event) or who the companion is (companion); empty for item")] = "",
+        location: Annotated[str, Field(description="Where the event happened; empty if unchanged or not an event")] = "",
+        action: Annotated[Literal["add", "remove"], Field(description="Whether the item is gained or lost; \"add\" unless kind is item")] = "add",
     ):
-        """Record a significant story event for continuity tracking.
+        """Record a change to the story state. Pass an empty string for any argument that does not apply.
         
-        Use this tool to remember important story beats so you can reference them later.
+        kind="event" for significant story beats: name is the event type ("combat", "discovery",
+        "npc_interaction", "location_change", "item_acquired"), description says what happened, and
+        location is where it happened (required for "location_change" so the player's position moves).
+        kind="item" when the player gains or loses an item: name is the item, action is "add" or "remove".
+        kind="companion" when an NPC joins the player: name is the NPC, description says who they are.
         
-        Args:
-            event_type: Type of event - "combat", "discovery", "npc_interaction", "location_change", "item_acquired"
-            description: Brief description of what happened
-            location: Where it happened (optional)
-            
         Returns:
-            Confirmation that event was recorded, plus pacing guidance
+            Confirmation message, plus pacing guidance for events
         """
+        if kind == "event":
+            return self._record_event(name, description, location)
+        elif kind == "item":
+            return self._update_inventory(name, action)
+        elif kind == "companion":
+            return self._add_companion(name, description)
+        
+        return "Invalid kind"
+    
+    def _record_event(self, event_type: str, description: str, location: Optional[str] = None) -> str:
+        """Record a significant story event and return pacing guidance."""
         self.turn_count += 1
         
-        event = {
+        self._log({
+            "kind": "event",
             "turn": self.turn_count,
             "type": event_type,
             "description": description,
             "location": location or self.current_location,
-            "timestamp": datetime.now().isoformat()
-        }
-        
-        self.story_events.append(event)
+            "timestamp": time.time()  # formatted to ISO by the log writer
+        })
         
         # Update current location if it changed
         if event_type == "location_change" and location:
             self.current_location = location
         
-        logger.info(f"📖 Story event recorded (Turn {self.turn_count}): {event_type} - {description}")
+        logger.info("📖 Story event recorded (Turn %d): %s - %s", self.turn_count, event_type, description)
         
         # Provide pacing guidance
-        pacing_msg = f"Event recorded: {description}. "
+        if self.turn_count < len(_PACING):
+            tail = _PACING[self.turn_count]
+        else:
+            tail = _PACING_CAP
         
-        if self.turn_count >= 7:
-            pacing_msg += "WRAP UP NOW - End the story in the next response with a satisfying conclusion."
-        elif self.turn_count >= 5:
-            pacing_msg += "CLIMAX - Build to the final confrontation or revelation NOW."
-        elif self.turn_count >= 3:
-            pacing_msg += "ESCALATE - Present the main challenge soon."
-        
-        return pacing_msg
+        return f"Event recorded: {description}. {tail}"
     
-    @function_tool
-    async def update_inventory(
-        self, 
-        context: RunContext, 
-        item: str,
-        action: str = "add"
-    ):
-        """Track items the player acquires or loses.
-        
-        Use this when player finds, buys, or loses items.
-        
-        Args:
-            item: Name of the item
-            action: "add" to give item to player, "remove" to take it away
-            
-        Returns:
-            Confirmation message
-        """
+    def _update_inventory(self, item: str, action: str = "add") -> str:
+        """Add an item to or remove it from the player's inventory."""
         if action == "add":
-            self.inventory.append(item)
-            logger.info(f"🎒 Added to inventory: {item}")
+            self.inventory[item] += 1
+            logger.info("🎒 Added to inventory: %s", item)
             return f"Added {item} to inventory"
         elif action == "remove":
-            if item in self.inventory:
-                self.inventory.remove(item)
-                logger.info(f"🎒 Removed from inventory: {item}")
+            if self.inventory[item] > 0:
+                self.inventory[item] -= 1
+                if not self.inventory[item]:
+                    del self.inventory[item]
+                logger.info("🎒 Removed from inventory: %s", item)
                 return f"Removed {item} from inventory"
             else:
                 return f"Player doesn't have {item}"
         
         return "Invalid action"
     
-    @function_tool
-    async def add_companion(self, context: RunContext, npc_name: str, description: str):
-        """Track NPCs who join the player as companions.
-        
-        Use this when an NPC agrees to travel with the player.
-        
-        Args:
-            npc_name: Name of the companion
-            description: Brief description (role, personality, etc.)
-            
-        Returns:
-            Confirmation message
-        """
+    def _add_companion(self, npc_name: str, description: str) -> str:
+        """Track an NPC who joins the player as a companion."""
         companion = {
             "name": npc_name,
             "description": description,
@@ -241,105 +298,13 @@ START: Begin by asking the player their character's name, then launch into the o
         }
         
         self.companions.append(companion)
-        logger.info(f"👥 Companion joined: {npc_name}")
+        logger.info("👥 Companion joined: %s", npc_name)
         
         return f"{npc_name} has joined as a companion"
     
-    @function_tool
-    async def record_clue(self, context: RunContext, clue: str, location: str):
-        """Record a clue discovered during investigation (Detective universe).
-        
-        Use this when the player finds evidence, witnesses something, or discovers information.
-        
-        Args:
-            clue: Description of the clue found
-            location: Where the clue was found
-            
-        Returns:
-            Confirmation message
-        """
-        clue_entry = {
-            "clue": clue,
-            "location": location,
-            "turn": self.turn_count,
-            "timestamp": datetime.now().isoformat()
-        }
-        
-        self.clues.append(clue_entry)
-        logger.info(f"🔍 Clue recorded: {clue}")
-        
-        return f"Clue recorded: {clue}"
-    
-    @function_tool
-    async def add_suspect(
-        self, 
-        context: RunContext, 
-        name: str, 
-        description: str,
-        motive: str = "Unknown",
-        alibi: str = "Unknown"
-    ):
-        """Track suspects in the case (Detective universe).
-        
-        Use this when the player encounters a person of interest in the investigation.
-        
-        Args:
-            name: Suspect's name
-            description: Physical description and background
-            motive: Their potential motive for the crime
-            alibi: Their claimed whereabouts during the crime
-            
-        Returns:
-            Confirmation message
-        """
-        suspect = {
-            "name": name,
-            "description": description,
-            "motive": motive,
-            "alibi": alibi,
-            "added_at_turn": self.turn_count
-        }
-        
-        self.suspects.append(suspect)
-        logger.info(f"🕵️ Suspect added: {name}")
-        
-        return f"Added {name} to suspect list"
-    
-    @function_tool
-    async def review_case_notes(self, context: RunContext):
-        """Review all clues and suspects collected so far (Detective universe).
-        
-        Use this when player asks to review their notes, clues, or suspect list.
-        
-        Returns:
-            Summary of all evidence and suspects
-        """
-        if not self.clues and not self.suspects:
-            return "You haven't collected any clues or identified any suspects yet."
-        
-        notes = "CASE NOTES:\n\n"
-        
-        if self.clues:
-            notes += "CLUES DISCOVERED:\n"
-            for i, clue_entry in enumerate(self.clues, 1):
-                notes += f"{i}. {clue_entry['clue']} (Found at: {clue_entry['location']})\n"
-            notes += "\n"
-        
-        if self.suspects:
-            notes += "SUSPECTS:\n"
-            for i, suspect in enumerate(self.suspects, 1):
-                notes += f"{i}. {suspect['name']}\n"
-                notes += f"   Motive: {suspect['motive']}\n"
-                notes += f"   Alibi: {suspect['alibi']}\n"
-            notes += "\n"
-        
-        logger.info(f"📋 Case notes reviewed: {len(self.clues)} clues, {len(self.suspects)} suspects")
-        
-        return notes
-    
     @function_tool
     async def save_session(self, context: RunContext, session_title: str):
-        """Save the current game session to a JSON file.
+        """Save the current game session's metadata to a JSON file.
         
         Use this when the player wants to end the session or at major story milestones.
         
@@ -349,44 +314,171 @@ START: Begin by asking the player their character's name, then launch into the o
         Returns:
             Confirmation with session details
         """
-        session_id = f"SESSION_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        
-        session_data = {
-            "session_id": session_id,
+        return await self._save_session(session_title)
+    
+    def _session_metadata(self, session_title: str) -> dict:
+        """Build the metadata record written by save_session."""
+        return {
+            "session_id": self._session_id,
             "title": session_title,
             "universe": self.universe,
             "tone": self.tone,
             "player_name": self.player_name,
             "total_turns": self.turn_count,
             "current_location": self.current_location,
-            "inventory": self.inventory,
+            "inventory": list(self.inventory.elements()),
             "companions": [c['name'] for c in self.companions],
-            "clues": self.clues if self.universe == "detective" else [],
-            "suspects": [s['name'] for s in self.suspects] if self.universe == "detective" else [],
-            "story_events": self.story_events,
+            "events_log": self._log_path.name,
             "timestamp": datetime.now().isoformat()
         }
+    
+    async def _save_session(self, session_title: str) -> str:
+        """Flush the session log and write the session metadata file."""
+        session_id = self._session_id
         
-        # Save to file
-        sessions_dir = Path("game_sessions")
-        sessions_dir.mkdir(exist_ok=True)
+        # Story events, clues and suspects are already in the session log;
+        # only the small metadata record is written here
+        session_data = self._session_metadata(session_title)
         
-        session_file = sessions_dir / f"{session_id}.json"
+        await self._flush_log()
         
-        with open(session_file, "w") as f:
-            json.dump(session_data, f, indent=2)
+        # Save to file off the event loop so audio keeps flowing
+        session_file = self._log_path.parent / f"{session_id}.meta.json"
+        payload = _dumps_indented(session_data)
+        await asyncio.to_thread(self._write_session_file, session_file, payload)
         
-        logger.info(f"💾 Session saved: {session_id} - {session_title}")
+        logger.info("💾 Session saved: %s - %s", session_id, session_title)
         
         summary = f"Session '{session_title}' saved! You played for {self.turn_count} turns"
         if self.inventory:
-            summary += f" and collected {len(self.inventory)} items"
+            summary += f" and collected {sum(self.inventory.values())} items"
         if self.companions:
             summary += f" with {len(self.companions)} companion(s)"
         
         return summary
 
 
+class DetectiveAgent(GameMasterAgent):
+    """Game Master for the detective universe, with the case-tracking tool."""
+    
+    def __init__(self, tone: str = "dramatic") -> None:
+        # Kept as parallel lists for the case notes
+        self._clue_texts: list[str] = []
+        self._clue_locations: list[str] = []
+        self._suspect_names: list[str] = []
+        self._suspect_motives: list[str] = []
+        self._suspect_alibis: list[str] = []
+        # Formatted case notes, reused until a clue or suspect is added
+        self._case_notes: Optional[str] = None
+        super().__init__(universe="detective", tone=tone)
+    
+    def _session_metadata(self, session_title: str) -> dict:
+        metadata = super()._session_metadata(session_title)
+        metadata["suspects"] = list(self._suspect_names)
+        return metadata
+    
+    @function_tool
+    async def case_action(
+        self,
+        context: RunContext,
+        op: Annotated[Literal["clue", "suspect", "review"], Field(description="What to do with the case notes")],
+        name: Annotated[str, Field(description="Suspect's name (suspect only)")] = "",
+        description: Annotated[str, Field(description="The clue found (clue), or the suspect's description and background (suspect)")] = "",
+        location: Annotated[str, Field(description="Where the clue was found (clue only)")] = "",
+        motive: Annotated[str, Field(description="Suspect's potential motive (suspect only)")] = "",
+        alibi: Annotated[str, Field(description="Suspect's claimed whereabouts during the crime (suspect only)")] = "",
+    ):
+        """Track the investigation. Pass an empty string for any argument that does not apply.
+        
+        op="clue" when the player finds evidence: description is the clue, location is where it was found.
+        op="suspect" when they meet a person of interest: name, description, and motive/alibi if known.
+        op="review" when they ask to review their notes: no other arguments are used.
+        
+        Returns:
+            Confirmation message, or the case notes for "review"
+        """
+        if op == "clue":
+            return self._record_clue(description, location)
+        elif op == "suspect":
+            return self._add_suspect(name, description, motive or "Unknown", alibi or "Unknown")
+        elif op == "review":
+            return self._review_case_notes()
+        
+        return "Invalid op"
+    
+    def _record_clue(self, clue: str, location: str) -> str:
+        """Record a clue discovered during the investigation."""
+        self._clue_texts.append(clue)
+        self._clue_locations.append(location)
+        self._case_notes = None
+        self._log({
+            "kind": "clue",
+            "clue": clue,
+            "location": location,
+            "turn": self.turn_count,
+            "timestamp": time.time()
+        })
+        logger.info("🔍 Clue recorded: %s", clue)
+        
+        return f"Clue recorded: {clue}"
+    
+    def _add_suspect(self, name: str, description: str, motive: str = "Unknown", alibi: str = "Unknown") -> str:
+        """Track a person of interest in the case."""
+        self._suspect_names.append(name)
+        self._suspect_motives.append(motive)
+        self._suspect_alibis.append(alibi)
+        self._case_notes = None
+        self._log({
+            "kind": "suspect",
+            "name": name,
+            "description": description,
+            "motive": motive,
+            "alibi": alibi,
+            "added_at_turn": self.turn_count,
+            "timestamp": time.time()
+        })
+        logger.info("🕵️ Suspect added: %s", name)
+        
+        return f"Added {name} to suspect list"
+    
+    def _review_case_notes(self) -> str:
+        """Summarize all clues and suspects collected so far."""
+        if not self._clue_texts and not self._suspect_names:
+            return "You haven't collected any clues or identified any suspects yet."
+        
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "📋 Case notes reviewed: %d clues, %d suspects",
+                len(self._clue_texts),
+                len(self._suspect_names),
+            )
+        
+        if self._case_notes is not None:
+            return self._case_notes
+        
+        parts = ["CASE NOTES:\n\n"]
+        
+        if self._clue_texts:
+            parts.append("CLUES DISCOVERED:\n")
+            parts.extend(
+                f"{i}. {clue} (Found at: {location})\n"
+                for i, (clue, location) in enumerate(zip(self._clue_texts, self._clue_locations), 1)
+            )
+            parts.append("\n")
+        
+        if self._suspect_names:
+            parts.append("SUSPECTS:\n")
+            suspects = zip(self._suspect_names, self._suspect_motives, self._suspect_alibis)
+            parts.extend(
+                f"{i}. {name}\n   Motive: {motive}\n   Alibi: {alibi}\n"
+                for i, (name, motive, alibi) in enumerate(suspects, 1)
+            )
+            parts.append("\n")
+        
+        self._case_notes = "".join(parts)
+        return self._case_notes
+
+
 def prewarm(proc: JobProcess):
     """Pre-load models to reduce latency"""
     proc.userdata["vad"] = silero.VAD.load()
@@ -403,7 +495,7 @@ async def entrypoint(ctx: JobContext):
     # Options: "dramatic", "humorous", "spooky", "epic", "noir"
     tone = "dramatic"
     
-    logger.info(f"🎲 Starting {tone} {universe} adventure")
+    logger.info("🎲 Starting %s %s adventure", tone, universe)
     
     # Create voice pipeline
     session = AgentSession(
@@ -412,7 +504,9 @@ async def entrypoint(ctx: JobContext):
         tts=murf.TTS(
             voice="en-US-matthew",  # Deep, narrative voice
             style="Narration",      # Story-telling style
-            tokenizer=tokenize.basic.SentenceTokenizer(min_sentence_len=2),
+            # min_sentence_len is in characters; 2 sent near word-sized fragments
+            # to Murf, each a separate synthesis request
+            tokenizer=tokenize.basic.SentenceTokenizer(min_sentence_len=20),
             text_pacing=True
         ),
         turn_detection=MultilingualModel(),
@@ -420,8 +514,14 @@ async def entrypoint(ctx: JobContext):
         preemptive_generation=True,
     )
     
+    # Only the detective universe gets the case-tracking tool
+    if universe == "detective":
+        agent = DetectiveAgent(tone=tone)
+    else:
+        agent = GameMasterAgent(universe=universe, tone=tone)
+    
     await session.start(
-        agent=GameMasterAgent(universe=universe, tone=tone),
+        agent=agent,
         room=ctx.room,
     )
     
@@ -431,4 +531,6 @@ async def entrypoint(ctx: JobContext):
 
 
 if __name__ == "__main__":
+    # Loaded here rather than at import so tests and tooling don't touch disk
+    load_dotenv(".env.local")
     cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
\ No newline at end of file
@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+import agent
+from agent import DetectiveAgent
+
+
+@pytest.fixture
+def sessions_dir(tmp_path, monkeypatch):
+    # Not created up front, so the agent must create it on its first write
+    path = tmp_path / "game_sessions"
+    monkeypatch.setattr(agent, "_SESSIONS_DIR", path)
+    return path
+
+
+@pytest.mark.asyncio
+async def test_session_log_and_metadata(sessions_dir) -> None:
+    """Events and clues go to the JSONL log; save_session writes the metadata file."""
+    gm = DetectiveAgent()
+    gm._record_event("location_change", "Walked into the Blue Note Club", "Blue Note Club")
+    gm._record_clue("Matchbook from the Starlight Diner", "Blue Note Club")
+    gm._add_suspect("Silas Vane", "Club owner", motive="Gambling debts")
+
+    await gm._save_session("The Blue Note")
+    await gm.on_exit()
+
+    log_file = sessions_dir / f"{gm._session_id}.jsonl"
+    records = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert [r["kind"] for r in records] == ["event", "clue", "suspect"]
+    assert records[0]["turn"] == 1
+    assert records[0]["location"] == "Blue Note Club"
+    assert records[1]["clue"] == "Matchbook from the Starlight Diner"
+    assert isinstance(records[1]["timestamp"], str)
+
+    meta = json.loads((sessions_dir / f"{gm._session_id}.meta.json").read_text())
+    assert meta["session_id"] == gm._session_id
+    assert meta["title"] == "The Blue Note"
+    assert meta["total_turns"] == 1
+    assert meta["current_location"] == "Blue Note Club"
+    assert meta["suspects"] == ["Silas Vane"]
+    assert meta["events_log"] == log_file.name
+
+
+def test_sessions_started_together_get_distinct_ids(sessions_dir) -> None:
+    """Two sessions created in the same second must not share log files."""
+    assert DetectiveAgent()._session_id != DetectiveAgent()._session_id